@@ -1,23 +1,61 @@
 #!/usr/bin/python3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from hashlib import sha256
-from json import JSONDecodeError, load
+from json import JSONDecodeError, dump, load
 from logging import basicConfig, warning, INFO, error, info
-from os import path, walk
+from os import DirEntry, O_CREAT, O_RDONLY, O_TRUNC, O_WRONLY, close, open as os_open, path, replace, scandir, \
+    sendfile, stat, stat_result
 from signal import signal, SIGTERM, Signals
+from threading import Condition, Lock, Thread, Timer, local
+from time import monotonic
 from types import FrameType
-from typing import Tuple
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
 
 from gi.repository import Gio, GLib  # GNOME APIs for file operations and DBus integration
 from watchdog.events import FileSystemEvent, FileSystemEventHandler, FileSystemMovedEvent
 from watchdog.observers import Observer
 
+try:
+    from hashlib import file_digest  # Python 3.11+, hashes inside C without holding the GIL
+except ImportError:
+    file_digest = None
+
+# The hash is only used for change detection, so prefer a fast non-cryptographic one if installed
+try:
+    from blake3 import blake3 as file_hasher
+
+    HASH_ALGORITHM = "blake3"
+except ImportError:
+    try:
+        from xxhash import xxh3_128 as file_hasher
+
+        HASH_ALGORITHM = "xxh3_128"
+    except ImportError:
+        file_hasher = sha256
+        HASH_ALGORITHM = "sha256"
+
 # Constants
 GOOGLE_DRIVE_PREFIX = "google-drive://"
+HASH_CHUNK_SIZE = 1 << 20  # 1 MiB per read keeps the per-chunk Python overhead negligible
+DIGEST_SIZE = 16  # Leading digest bytes kept for comparisons and the index, plenty for change detection
+COPY_CHUNK_SIZE = 1 << 20  # Bytes handed to sendfile per call when copying through the gvfs FUSE mount
+REMOTE_INFO_ATTRIBUTES = "standard::size,etag::value,time::modified,time::modified-usec"
+REMOTE_LIST_ATTRIBUTES = "standard::name,standard::display-name,standard::size,standard::type"
 
 # Load configuration
 CONFIG_DIR = path.expanduser("~/.config/drive-sync/")
 CONFIG_PATH = path.join(CONFIG_DIR, "config.json")
 LOG_FILE = path.join(CONFIG_DIR, "sync.log")
+INDEX_PATH = path.join(CONFIG_DIR, "index.json")
+INDEX_SAVE_DELAY = 5.0  # Seconds to wait for further updates before writing the index to disk
+HASH_CACHE_SIZE = 4096  # Number of local file hashes kept in memory
+SYNC_DEBOUNCE_DELAY = 0.25  # Seconds a path has to stay quiet before it is synced
+SYNC_MAX_DELAY = 5.0  # Seconds after the first queued event a path is synced even if it keeps changing
+SYNC_QUEUE_SIZE = 10000  # Pending paths before the watchdog thread has to wait for the workers
+SYNC_WORKERS = 2  # Threads syncing queued paths
+INITIAL_SYNC_WORKERS = 8  # Concurrent transfers during a full sync, the work is I/O bound
+REMOTE_HASH_MAX_SIZE = 64 << 20  # Above this size re-uploading is cheaper than streaming the remote file back
 
 # Set up logging
 basicConfig(
@@ -49,14 +87,137 @@ def load_config() -> Tuple[str, str, str]:
 
 # Set paths from config
 LOCAL_FOLDER, GOOGLE_DRIVE_FOLDER, DRIVE_USER = load_config()
+# Destination URIs are this prefix followed by the path relative to LOCAL_FOLDER
+DRIVE_URI_PREFIX = path.join(f"{GOOGLE_DRIVE_PREFIX}{DRIVE_USER}", GOOGLE_DRIVE_FOLDER.strip("/"), "")
 
 
-def is_drive_available() -> bool:
+def load_index() -> Tuple[Dict[str, List], Dict[str, List]]:
+    """
+    Load the sidecar index.
+
+    It maps local paths to their last synced [size, mtime_ns, digest] and remote URIs to their last seen
+    [version, digest]. Digests are stored as hex on disk and held as bytes in memory.
+    """
+    try:
+        with open(INDEX_PATH, "r") as index_file:
+            index = load(index_file)
+        if not isinstance(index, dict) or not isinstance(index.get("files"), dict):
+            warning("Ignoring malformed index file.")
+            return {}, {}
+        files = index["files"]
+        remote = index.get("remote") if isinstance(index.get("remote"), dict) else {}
+        same_algorithm = index.get("algorithm") == HASH_ALGORITHM
+        if not same_algorithm:
+            # Size and mtime stay valid, only the hashes have to be recomputed with the new algorithm
+            info(f"Hash algorithm changed from {index.get('algorithm')} to {HASH_ALGORITHM}, dropping stored hashes.")
+            remote = {}
+        for entry in files.values():
+            entry[2] = bytes.fromhex(entry[2])[:DIGEST_SIZE] if same_algorithm else b""
+        for entry in remote.values():
+            entry[1] = bytes.fromhex(entry[1])[:DIGEST_SIZE]
+        return files, remote
+    except FileNotFoundError:
+        pass
+    except (JSONDecodeError, OSError, ValueError, TypeError, IndexError) as e:
+        warning(f"Failed to load index file, starting with an empty one: {e}")
+    return {}, {}
+
+
+_index, _remote_index = load_index()
+_index_lock = Lock()
+_index_save_timer: Optional[Timer] = None
+_index_save_lock = Lock()  # Serialises writers of the temporary file, e.g. the timer and the shutdown flush
+
+
+def save_index() -> None:
+    """Write the sidecar index to disk atomically."""
+    global _index_save_timer
+    with _index_save_lock:
+        with _index_lock:
+            _index_save_timer = None
+            snapshot = {
+                "algorithm": HASH_ALGORITHM,
+                "files": {
+                    file_path: [size, mtime_ns, digest.hex()] for file_path, (size, mtime_ns, digest) in _index.items()
+                },
+                "remote": {uri: [version, digest.hex()] for uri, (version, digest) in _remote_index.items()},
+            }
+        tmp_path = f"{INDEX_PATH}.tmp"
+        try:
+            with open(tmp_path, "w") as index_file:
+                dump(snapshot, index_file)
+            replace(tmp_path, INDEX_PATH)  # Atomic on POSIX, readers never see a half-written index
+        except OSError as e:
+            error(f"Failed to save index file: {e}")
+
+
+def schedule_index_save() -> None:
+    """Debounce index writes so a burst of synced files results in a single save."""
+    global _index_save_timer
+    with _index_lock:
+        if _index_save_timer is not None:
+            return
+        _index_save_timer = Timer(INDEX_SAVE_DELAY, save_index)
+        _index_save_timer.daemon = True
+        _index_save_timer.start()
+
+
+def flush_index() -> None:
+    """Cancel a pending debounced save and write the index immediately."""
+    with _index_lock:
+        pending = _index_save_timer
+    if pending is not None:
+        pending.cancel()
+    save_index()  # Also waits for a timer save that is already writing, so exiting can't cut it short
+
+
+def get_index_entry(file_path: str) -> Optional[List]:
+    """Return the [size, mtime_ns, hash] the local file had when it last matched Google Drive."""
+    with _index_lock:
+        return _index.get(file_path)
+
+
+def update_index(file_path: str, file_stat: stat_result, file_hash: bytes) -> None:
+    """Record the state of a local file that is known to match Google Drive."""
+    with _index_lock:
+        _index[file_path] = [file_stat.st_size, file_stat.st_mtime_ns, file_hash]
+    schedule_index_save()
+
+
+def forget_index_entry(file_path: str) -> None:
+    """Drop a local path that was moved away or deleted, a later sync falls back to comparing with Google Drive."""
+    with _index_lock:
+        removed = _index.pop(file_path, None)
+    if removed is not None:
+        schedule_index_save()
+
+
+def get_cached_remote_hash(uri: str, version: str) -> bytes:
+    """Return the stored hash of a remote file if it has not changed since it was last hashed."""
+    with _index_lock:
+        entry = _remote_index.get(uri)
+    return entry[1] if entry is not None and entry[0] == version else b""
+
+
+def update_remote_index(uri: str, version: str, file_hash: bytes) -> None:
+    """Remember the hash of a remote file for the given version."""
+    with _index_lock:
+        _remote_index[uri] = [version, file_hash]
+    schedule_index_save()
+
+
+def invalidate_remote_index(uri: str) -> None:
+    """Forget the stored hash of a remote file after it was replaced or removed."""
+    with _index_lock:
+        removed = _remote_index.pop(uri, None)
+    if removed is not None:
+        schedule_index_save()
+
+
+def scan_for_drive() -> bool:
     """Check if Google Drive is mounted using GNOME's Gio.VolumeMonitor."""
-    # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/class-VolumeMonitor.html#gi.repository.Gio.VolumeMonitor.get
-    volume_monitor = Gio.VolumeMonitor.get()
     # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/class-VolumeMonitor.html#gi.repository.Gio.VolumeMonitor.get_mounts
-    mounts = volume_monitor.get_mounts()
+    mounts = _volume_monitor.get_mounts()
 
     for mount in mounts:
         # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/interface-Mount.html#gi.repository.Gio.Mount.get_root
@@ -67,13 +228,42 @@ def is_drive_available() -> bool:
     return False
 
 
+def refresh_drive_available() -> None:
+    """Rescan the mounts and update the cached Google Drive state."""
+    global _drive_mounted
+    mounted = scan_for_drive()
+    with _drive_mount_lock:
+        _drive_mounted = mounted
+
+
+def is_drive_available() -> bool:
+    """Return the cached Google Drive mount state, refreshed on mount attempts and copy failures."""
+    with _drive_mount_lock:
+        return _drive_mounted
+
+
+# https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/class-VolumeMonitor.html#gi.repository.Gio.VolumeMonitor.get
+_volume_monitor = Gio.VolumeMonitor.get()
+_drive_mount_lock = Lock()
+_mount_lock = Lock()  # Held while mounting, so parallel syncs don't each run a main loop on the default context
+_drive_mounted = scan_for_drive()
+
+
 def mount_google_drive() -> None:
+    """Attempt to manually mount Google Drive, letting only one thread at a time run a mount main loop."""
+    with _mount_lock:
+        # Another thread may have mounted the drive while this one was waiting, or it was never really gone
+        refresh_drive_available()
+        if is_drive_available():
+            return
+        _mount_google_drive()
+
+
+def _mount_google_drive() -> None:
     """Attempt to manually mount Google Drive using Gio.VolumeMonitor."""
     info("Attempting to mount Google Drive...")
-    # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/class-VolumeMonitor.html#gi.repository.Gio.VolumeMonitor.get
-    volume_monitor = Gio.VolumeMonitor.get()
     # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/class-VolumeMonitor.html#gi.repository.Gio.VolumeMonitor.get_volumes
-    volumes = volume_monitor.get_volumes()
+    volumes = _volume_monitor.get_volumes()
     # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/GLib-2.0/structure-MainLoop.html#gi.repository.GLib.MainLoop
     loop = GLib.MainLoop()  # Create a main loop to handle async calls
 
@@ -92,6 +282,7 @@ def mount_google_drive() -> None:
                 except Exception as e:
                     error(f"Failed to mount Google Drive: {e}")
                 finally:
+                    refresh_drive_available()
                     loop.quit()  # Stop the event loop once done
 
             identifier_value = volume.get_identifier(identifier)
@@ -109,41 +300,209 @@ def mount_google_drive() -> None:
     warning("No Google Drive volume found to mount.")
 
 
-def get_remote_file_hash(dest_file: Gio.File) -> str:
-    """Compute the SHA256 hash of a remote Google Drive file."""
-    try:
-        stream = dest_file.read(None)
-        hasher = sha256()
+def get_remote_version(file_info: Gio.FileInfo) -> str:
+    """Identify the current revision of a remote file by its ETag, falling back to its modification time."""
+    # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/class-FileInfo.html#gi.repository.Gio.FileInfo.get_attribute_as_string
+    etag = file_info.get_attribute_as_string("etag::value")
+    if etag:
+        return etag
+    modified = file_info.get_attribute_as_string("time::modified")
+    if modified:
+        return f"{modified}.{file_info.get_attribute_as_string('time::modified-usec') or 0}"
+    return ""
+
 
-        while True:
-            buffer = stream.read_bytes(4096)
-            if buffer.get_size() == 0:  # Proper EOF check
-                break
-            hasher.update(buffer.get_data())  # Convert GLib.Bytes to raw bytes
+_read_buffers = local()
 
-        stream.close()  # Ensure the stream is closed
-        return hasher.hexdigest()
+
+def hash_file_object(f: BinaryIO) -> bytes:
+    """Hash an open binary file by reading it into a per-thread buffer that is reused across calls."""
+    view = getattr(_read_buffers, "view", None)
+    if view is None:
+        view = _read_buffers.view = memoryview(bytearray(HASH_CHUNK_SIZE))
+    hasher = file_hasher()
+    while read := f.readinto(view):
+        hasher.update(view[:read])
+    return hasher.digest()[:DIGEST_SIZE]
+
+
+def get_remote_file_hash(dest_file: Gio.File, version: str = "") -> bytes:
+    """Compute the change detection hash of a remote Google Drive file, reusing the stored one for a known version."""
+    uri = dest_file.get_uri()
+    if version:
+        cached_hash = get_cached_remote_hash(uri, version)
+        if cached_hash:
+            return cached_hash
+    try:
+        # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/interface-File.html#gi.repository.Gio.File.get_path
+        fuse_path = dest_file.get_path()
+        if fuse_path is not None:
+            # Reading through the gvfs FUSE mount fills the reusable buffer instead of allocating GLib.Bytes per chunk
+            with open(fuse_path, "rb", buffering=0) as f:
+                remote_hash = hash_file_object(f)
+        else:
+            stream = dest_file.read(None)
+            hasher = file_hasher()
+
+            while True:
+                buffer = stream.read_bytes(HASH_CHUNK_SIZE)
+                if buffer.get_size() == 0:  # Proper EOF check
+                    break
+                hasher.update(buffer.get_data())  # Convert GLib.Bytes to raw bytes
+
+            stream.close()  # Ensure the stream is closed
+            remote_hash = hasher.digest()[:DIGEST_SIZE]
     except Exception as e:
         error(f"Failed to compute remote file hash: {e}")
-        return ""
+        return b""
+    if version:
+        update_remote_index(uri, version, remote_hash)
+    return remote_hash
+
+
+_hash_cache: "OrderedDict[str, Tuple[int, int, bytes]]" = OrderedDict()
+_hash_cache_lock = Lock()
+
 
+def invalidate_hash_cache(file_path: str) -> None:
+    """Forget the cached hash of a local file, e.g. after it was moved or deleted."""
+    with _hash_cache_lock:
+        _hash_cache.pop(file_path, None)
 
-def compute_file_hash(file_path: str) -> str:
-    """Compute the SHA256 hash of a local file."""
+
+def same_stat(a: stat_result, b: stat_result) -> bool:
+    """Check whether two stat results describe the same file contents as far as size and mtime can tell."""
+    return a.st_size == b.st_size and a.st_mtime_ns == b.st_mtime_ns
+
+
+def compute_file_hash(file_path: str) -> Tuple[bytes, Optional[stat_result]]:
+    """
+    Compute the change detection hash of a local file, reusing the last result while size and mtime are unchanged.
+
+    Returns the hash together with the stat it belongs to. The hash is empty if it failed or the file changed while
+    it was hashed.
+    """
+    try:
+        file_stat = stat(file_path)
+    except OSError as e:
+        error(f"Failed to compute local file hash: {e}")
+        return b"", None
+
+    with _hash_cache_lock:
+        cached = _hash_cache.get(file_path)
+        if cached is not None and cached[0] == file_stat.st_size and cached[1] == file_stat.st_mtime_ns:
+            _hash_cache.move_to_end(file_path)
+            return cached[2], file_stat
+
+    file_hash = _hash_local_file(file_path)
+    try:
+        hashed_stat = stat(file_path)
+    except OSError as e:
+        error(f"Failed to compute local file hash: {e}")
+        return b"", None
+    if not same_stat(file_stat, hashed_stat):
+        info(f"{file_path} changed while it was hashed.")
+        return b"", hashed_stat
+    if file_hash:
+        with _hash_cache_lock:
+            _hash_cache[file_path] = (file_stat.st_size, file_stat.st_mtime_ns, file_hash)
+            _hash_cache.move_to_end(file_path)
+            while len(_hash_cache) > HASH_CACHE_SIZE:
+                _hash_cache.popitem(last=False)
+    return file_hash, file_stat
+
+
+def _hash_local_file(file_path: str) -> bytes:
+    """Compute the change detection hash of a local file."""
     try:
-        hasher = sha256()
-        with open(file_path, "rb") as f:
-            while chunk := f.read(4096):
-                hasher.update(chunk)
-        return hasher.hexdigest()
+        # Never mmap the file: editors may truncate it while it is hashed, which would kill the service with SIGBUS
+        with open(file_path, "rb", buffering=0) as f:
+            if file_digest is not None:
+                return file_digest(f, file_hasher).digest()[:DIGEST_SIZE]
+            return hash_file_object(f)
     except Exception as e:
         error(f"Failed to compute local file hash: {e}")
-        return ""
+        return b""
+
+
+def copy_to_drive(file_path: str, dest_file: Gio.File) -> None:
+    """Copy a local file to Google Drive, preferring a zero-copy sendfile through the gvfs FUSE mount."""
+    # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/interface-File.html#gi.repository.Gio.File.get_path
+    fuse_path = dest_file.get_path()
+    if fuse_path is not None:
+        try:
+            _sendfile_copy(file_path, fuse_path)
+            return
+        except OSError as e:
+            warning(f"Copying {file_path} through {fuse_path} failed, falling back to Gio: {e}")
+    # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/interface-File.html#gi.repository.Gio.File.copy
+    Gio.File.new_for_path(file_path).copy(dest_file, Gio.FileCopyFlags.OVERWRITE)
 
 
-def sync_file(file_path: str) -> None:
+def _sendfile_copy(src_path: str, dst_path: str) -> None:
+    """Copy a file in the kernel with sendfile, without a round-trip of every chunk through Python."""
+    # No posix_fallocate: gvfs doesn't implement it and glibc's emulation would write one byte per block to Drive
+    src_fd = os_open(src_path, O_RDONLY)
+    try:
+        dst_fd = os_open(dst_path, O_WRONLY | O_CREAT | O_TRUNC, 0o644)
+        try:
+            offset = 0
+            while sent := sendfile(dst_fd, src_fd, offset, COPY_CHUNK_SIZE):
+                offset += sent
+        finally:
+            close(dst_fd)
+    finally:
+        close(src_fd)
+
+
+_existing_dirs: Set[str] = set()  # Destination directory URIs known to exist
+_existing_dirs_lock = Lock()
+
+
+def remember_directory(directory: Gio.File) -> None:
+    """Mark a destination directory and all its ancestors as existing."""
+    uris = []
+    while directory is not None:
+        uris.append(directory.get_uri())
+        # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/interface-File.html#gi.repository.Gio.File.get_parent
+        directory = directory.get_parent()
+    with _existing_dirs_lock:
+        _existing_dirs.update(uris)
+
+
+def forget_directory(directory: Gio.File) -> None:
+    """Drop a destination directory from the cache, e.g. when writing into it failed."""
+    with _existing_dirs_lock:
+        _existing_dirs.discard(directory.get_uri())
+
+
+def ensure_directory(directory: Gio.File) -> bool:
+    """Create a destination directory unless it is already known to exist, returning whether it exists now."""
+    with _existing_dirs_lock:
+        if directory.get_uri() in _existing_dirs:
+            return True
+    try:
+        # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/interface-File.html#gi.repository.Gio.File.make_directory_with_parents
+        directory.make_directory_with_parents()
+        info(f"Created parent directory: {directory.get_uri()}")
+    except GLib.Error as e:
+        if not e.matches(Gio.io_error_quark(), Gio.IOErrorEnum.EXISTS):
+            warning(f"Failed to create parent directory {directory.get_uri()}: {e}")
+            return False
+    remember_directory(directory)
+    return True
+
+
+# One slot per concurrent sync, so parallel full-sync workers never queue behind each other's remote reads
+_remote_hash_executor = ThreadPoolExecutor(max_workers=INITIAL_SYNC_WORKERS, thread_name_prefix="remote-hash")
+
+
+def sync_file(file_path: str, file_stat: Optional[stat_result] = None, *, force: bool = False,
+              known_missing: bool = False) -> None:
     """Ensure the destination file exists in Google Drive before copying and syncing changes."""
-    """Sync a single file to Google Drive using Gio.File. Uses SHA256 hashes for change detection."""
+    """Sync a single file to Google Drive using Gio.File. Uses file hashes for change detection."""
+    # `file_stat` saves the stat call when the caller already has it, `force` bypasses the sidecar index and
+    # `known_missing` skips querying a destination known not to exist or known to be outdated
     if not is_drive_available():
         info("Google Drive not found. Attempting to mount...")
         mount_google_drive()
@@ -151,50 +510,98 @@ def sync_file(file_path: str) -> None:
             warning("Mounting failed. Skipping sync.")
             return
 
+    if file_stat is None:
+        try:
+            file_stat = stat(file_path)
+        except OSError as e:
+            warning(f"Skipping {file_path}: {e}")
+            return
+    # The index is the source of truth for what was last uploaded, so the remote copy only has to be read
+    # for files it doesn't know yet or when a full sync found the remote changed behind our back
+    entry = None if force else get_index_entry(file_path)
+    local_hash, hashed_stat = b"", None
+    if entry is not None:
+        if entry[0] == file_stat.st_size and entry[1] == file_stat.st_mtime_ns:
+            info(f"Skipping {file_path}: Unchanged since last sync.")
+            return
+        if entry[2]:
+            local_hash, hashed_stat = compute_file_hash(file_path)
+            if local_hash == entry[2]:
+                update_index(file_path, hashed_stat, local_hash)
+                info(f"Skipping {file_path}: Only touched since last sync.")
+                return
+            known_missing = True  # Google Drive holds the previous upload, which is known to differ
+
     rel_path = path.relpath(file_path, LOCAL_FOLDER)
-    drive_file_path = f"{GOOGLE_DRIVE_PREFIX}{DRIVE_USER}/{path.join(GOOGLE_DRIVE_FOLDER, rel_path).lstrip('/')}"
+    drive_file_path = DRIVE_URI_PREFIX + rel_path
 
-    # Create Gio file objects for source and destination
-    # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/interface-File.html#gi.repository.Gio.File.new_for_path
-    src_file = Gio.File.new_for_path(file_path)
+    # Create Gio file object for the destination
     # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/interface-File.html#gi.repository.Gio.File.new_for_uri
     dest_file = Gio.File.new_for_uri(drive_file_path)
     # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/interface-File.html#gi.repository.Gio.File.get_parent
     parent_dir = dest_file.get_parent()
-    # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/interface-File.html#gi.repository.Gio.File.query_exists
-    if parent_dir and not parent_dir.query_exists():
-        try:
-            # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/interface-File.html#gi.repository.Gio.File.make_directory_with_parents
-            parent_dir.make_directory_with_parents()
-            info(f"Created parent directory: {parent_dir.get_uri()}")
-        except Exception as e:
-            warning(f"Failed to create parent directory {parent_dir.get_uri()}: {e}")
-            return
+    if parent_dir and not ensure_directory(parent_dir):
+        return
 
-    # Check if file exists and compare hashes before deleting and copying
-    # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/interface-File.html#gi.repository.Gio.File.query_exists
-    if dest_file.query_exists():
-        remote_hash = get_remote_file_hash(dest_file)
-        local_hash = compute_file_hash(file_path)  # Attempt to fetch an ETag for the local file
-        if remote_hash and remote_hash == local_hash:
-            info(f"Skipping {file_path}: No changes detected.")
-            return
+    # Check if file exists and compare sizes, then hashes, before overwriting it
+    dest_info = None
+    if not known_missing:
         try:
-            # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/interface-File.html#gi.repository.Gio.File.delete
-            dest_file.delete()
-            info(f"Deleted existing file: {drive_file_path}")
-            # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/interface-File.html#gi.repository.Gio.File.new_for_uri
-            dest_file = Gio.File.new_for_uri(drive_file_path)
-        except Exception as e:
-            error(f"Failed to delete existing file {drive_file_path}: {e}")
+            # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/interface-File.html#gi.repository.Gio.File.query_info
+            dest_info = dest_file.query_info(REMOTE_INFO_ATTRIBUTES, Gio.FileQueryInfoFlags.NONE, None)
+        except GLib.Error:
+            pass  # The destination does not exist yet
+
+    # Differing sizes already prove a change, only equally sized files need their contents compared
+    if (dest_info is not None and dest_info.get_size() == file_stat.st_size
+            and file_stat.st_size <= REMOTE_HASH_MAX_SIZE):
+        # Stream the remote file in the background while the local file is hashed on this thread
+        remote_future = _remote_hash_executor.submit(get_remote_file_hash, dest_file, get_remote_version(dest_info))
+        local_hash, hashed_stat = compute_file_hash(file_path)
+        remote_hash = remote_future.result()
+        if local_hash and remote_hash == local_hash:
+            update_index(file_path, hashed_stat, local_hash)
+            info(f"Skipping {file_path}: No changes detected.")
             return
 
+    # Hash what is about to be uploaded, a later save must not be recorded as synced
+    if not local_hash:
+        local_hash, hashed_stat = compute_file_hash(file_path)
+
+    # OVERWRITE replaces an existing destination in place, no separate delete round-trip needed
     try:
-        src_file.copy(dest_file, Gio.FileCopyFlags.OVERWRITE)
+        copy_to_drive(file_path, dest_file)
     except Exception as e:
         warning(f"Failed to copy {file_path} to {drive_file_path}: {e}")
+        refresh_drive_available()  # The drive may have gone away, nothing else notices that
+        if parent_dir:
+            forget_directory(parent_dir)  # It may have been removed remotely, check again next time
         return
-    info(f"Synced: {file_path} -> {drive_file_path}")
+    finally:
+        invalidate_remote_index(dest_file.get_uri())  # Even a failed copy may have touched the remote file
+    if local_hash:
+        # Only record the hash if the file still has the stat it was hashed under, i.e. the upload copied exactly
+        # those contents. Otherwise the next event uploads the newer version.
+        try:
+            uploaded_stat = stat(file_path)
+        except OSError:
+            uploaded_stat = None
+        if uploaded_stat is not None and same_stat(uploaded_stat, hashed_stat):
+            update_index(file_path, hashed_stat, local_hash)
+        else:
+            info(f"{file_path} changed during the upload, not recording it as synced.")
+    if dest_info is not None:
+        info(f"Overwrote changed file: {file_path} -> {drive_file_path}")
+    else:
+        info(f"Synced: {file_path} -> {drive_file_path}")
+
+
+class SyncJob(NamedTuple):
+    """A file to sync during a full sync, with the sync_file options the remote listing decided on."""
+    file_path: str
+    file_stat: stat_result
+    force: bool = False
+    known_missing: bool = False
 
 
 def sync_all_files() -> None:
@@ -207,12 +614,167 @@ def sync_all_files() -> None:
             warning("Mounting failed. Skipping initial sync.")
             return
 
-    for root, _, files in walk(LOCAL_FOLDER):
-        for file in files:
-            sync_file(path.join(root, file))
+    remote_tree = list_remote_tree()
+    jobs: List[SyncJob] = []
+    for entry in iter_files(LOCAL_FOLDER):
+        try:
+            file_stat = entry.stat()  # Cached on the DirEntry and reused by sync_file
+        except OSError as e:
+            warning(f"Skipping {entry.path}: {e}")
+            continue
+        if remote_tree is None:
+            jobs.append(SyncJob(entry.path, file_stat))  # Listing failed, let sync_file query every file
+            continue
+        remote_size = remote_tree.get(path.relpath(entry.path, LOCAL_FOLDER))
+        if remote_size is None:
+            jobs.append(SyncJob(entry.path, file_stat, force=True, known_missing=True))
+            continue
+        # A remote copy of a different size was changed or replaced behind our back, so don't trust the index
+        jobs.append(SyncJob(entry.path, file_stat, force=remote_size != file_stat.st_size))
+
+    with ThreadPoolExecutor(max_workers=INITIAL_SYNC_WORKERS, thread_name_prefix="initial-sync") as executor:
+        for job, failure in zip(jobs, executor.map(_sync_file_safely, jobs)):
+            if failure is not None:
+                error(f"Unexpected error while syncing {job.file_path}: {failure}")
     info("Initial sync complete.")
 
 
+def iter_files(root: str) -> Iterator[DirEntry]:
+    """Recursively yield the files below root, with scandir's cached type and stat information."""
+    # Like os.walk, don't descend into symlinked directories but do include symlinked files
+    try:
+        with scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from iter_files(entry.path)
+                elif entry.is_file():
+                    yield entry
+    except OSError as e:
+        warning(f"Failed to list {root}: {e}")
+
+
+def _sync_file_safely(job: SyncJob) -> Optional[Exception]:
+    """Run sync_file and hand back any unexpected exception instead of raising it in the pool."""
+    try:
+        sync_file(job.file_path, job.file_stat, force=job.force, known_missing=job.known_missing)
+    except Exception as e:
+        return e
+    return None
+
+
+def list_remote_tree() -> Optional[Dict[str, int]]:
+    """
+    List all files below the destination folder with one enumeration per directory.
+
+    Returns a mapping of paths relative to the destination folder to their size, or None if listing failed.
+    """
+    tree: Dict[str, int] = {}
+    root = Gio.File.new_for_uri(DRIVE_URI_PREFIX)
+    directories: List[Tuple[Gio.File, str]] = [(root, "")]
+    try:
+        while directories:
+            directory, rel_dir = directories.pop()
+            # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/interface-File.html#gi.repository.Gio.File.enumerate_children
+            enumerator = directory.enumerate_children(REMOTE_LIST_ATTRIBUTES, Gio.FileQueryInfoFlags.NONE, None)
+            try:
+                for child_info in enumerator:
+                    # Google Drive names children by their ID, the title that appears in URIs is the display name
+                    rel_path = path.join(rel_dir, child_info.get_display_name())
+                    if child_info.get_file_type() == Gio.FileType.DIRECTORY:
+                        directories.append((directory.get_child(child_info.get_name()), rel_path))
+                        remember_directory(Gio.File.new_for_uri(DRIVE_URI_PREFIX + rel_path))
+                    else:
+                        tree[rel_path] = child_info.get_size()
+            finally:
+                # https://amolenaar.pages.gitlab.gnome.org/pygobject-docs/Gio-2.0/class-FileEnumerator.html#gi.repository.Gio.FileEnumerator.close
+                enumerator.close(None)
+    except GLib.Error as e:
+        if rel_dir == "" and e.matches(Gio.io_error_quark(), Gio.IOErrorEnum.NOT_FOUND):
+            return {}  # The destination folder does not exist yet, so neither does any file in it
+        warning(f"Failed to list remote files, checking them one by one instead: {e}")
+        return None
+    remember_directory(root)
+    return tree
+
+
+_pending_syncs: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # Path -> (deadline, first queued)
+_syncs_in_flight: Set[str] = set()  # Paths currently synced by a worker, never synced twice at once
+_pending_condition = Condition()
+_sync_workers: List[Thread] = []
+_stopping = False
+
+
+def queue_sync(file_path: str) -> None:
+    """Schedule a debounced sync, coalescing repeated events for the same path."""
+    with _pending_condition:
+        if file_path not in _pending_syncs and len(_pending_syncs) >= SYNC_QUEUE_SIZE:
+            warning(f"Sync queue is full, waiting before queueing {file_path}")
+            # Block the watchdog thread like a bounded queue would, rather than dropping the event
+            _pending_condition.wait_for(lambda: len(_pending_syncs) < SYNC_QUEUE_SIZE or _stopping)
+        now = monotonic()
+        _, queued_at = _pending_syncs.get(file_path, (now, now))
+        # Each event pushes the deadline out again, but a path that never stays quiet is still synced eventually
+        _pending_syncs[file_path] = (min(now + SYNC_DEBOUNCE_DELAY, queued_at + SYNC_MAX_DELAY), queued_at)
+        _pending_condition.notify_all()
+
+
+def discard_pending_sync(file_path: str) -> None:
+    """Drop a scheduled sync, e.g. for the temporary source of an atomic save."""
+    with _pending_condition:
+        _pending_syncs.pop(file_path, None)
+
+
+def _next_due_sync() -> Optional[str]:
+    """Block until a queued path is due and no other worker is syncing it, or return None when stopping."""
+    with _pending_condition:
+        while not _stopping:
+            timeout = None
+            now = monotonic()
+            # Capped deadlines don't follow insertion order, so look at every path, oldest first
+            for file_path, (deadline, _) in _pending_syncs.items():
+                if file_path in _syncs_in_flight:
+                    continue
+                if deadline <= now:
+                    del _pending_syncs[file_path]
+                    _syncs_in_flight.add(file_path)
+                    _pending_condition.notify_all()  # Room in the queue for a blocked producer
+                    return file_path
+                timeout = deadline - now if timeout is None else min(timeout, deadline - now)
+            _pending_condition.wait(timeout)
+        return None
+
+
+def sync_worker() -> None:
+    """Sync queued paths once their debounce deadline has passed."""
+    while (file_path := _next_due_sync()) is not None:
+        try:
+            sync_file(file_path)
+        except Exception as e:
+            error(f"Unexpected error while syncing {file_path}: {e}")
+        finally:
+            with _pending_condition:
+                _syncs_in_flight.discard(file_path)
+                _pending_condition.notify_all()  # A newer event for this path may be waiting
+
+
+def start_sync_workers() -> None:
+    """Start the threads that take queued paths off the watchdog thread and sync them."""
+    for number in range(SYNC_WORKERS):
+        worker = Thread(target=sync_worker, name=f"sync-worker-{number}", daemon=True)
+        worker.start()
+        _sync_workers.append(worker)
+
+
+def stop_sync_workers() -> None:
+    """Let the workers finish their current file and exit, pending paths are picked up by the next full sync."""
+    global _stopping
+    with _pending_condition:
+        _stopping = True
+        _pending_condition.notify_all()
+    for worker in _sync_workers:
+        worker.join()
+
+
 # noinspection PyUnusedLocal
 def on_user_logout(proxy, changed_properties, invalidated_properties, observer: Observer) -> None:
     """Handle user logout event using DBus and stop the sync service."""
@@ -222,6 +784,8 @@ def on_user_logout(proxy, changed_properties, invalidated_properties, observer:
         info("User logged out. Stopping sync service...")
         observer.stop()
         observer.join()
+        stop_sync_workers()
+        flush_index()
         info("Sync service stopped.")
         exit(0)
 
@@ -236,29 +800,69 @@ def on_screen_locked(proxy, changed_properties, invalidated_properties) -> None:
         sync_all_files()
 
 
+_stat_cache: Dict[str, Tuple[int, int]] = {}  # Path -> (mtime_ns, size) of the last event that was queued
+_stat_cache_lock = Lock()
+
+
+def has_content_changed(file_path: str) -> bool:
+    """Check size and mtime against the last event for this path to ignore metadata-only events like chmod."""
+    try:
+        file_stat = stat(file_path)
+    except OSError:
+        return False  # Already gone again, e.g. an editor's temporary file
+    key = (file_stat.st_mtime_ns, file_stat.st_size)
+    with _stat_cache_lock:
+        if _stat_cache.get(file_path) == key:
+            return False
+        _stat_cache[file_path] = key
+    return True
+
+
+def forget_stat(file_path: str) -> None:
+    """Drop the last seen stat of a path that was moved away or deleted."""
+    with _stat_cache_lock:
+        _stat_cache.pop(file_path, None)
+
+
 class SyncHandler(FileSystemEventHandler):
     """Monitor file system events and trigger sync operations."""
 
     def on_moved(self, event: FileSystemMovedEvent) -> None:
         """Handle moved files (common with text editors doing atomic saves)."""
         if not event.is_directory:
-            sync_file(event.dest_path)
+            invalidate_hash_cache(event.src_path)
+            invalidate_hash_cache(event.dest_path)
+            discard_pending_sync(event.src_path)
+            forget_stat(event.src_path)
+            forget_index_entry(event.src_path)
+            if has_content_changed(event.dest_path):
+                queue_sync(event.dest_path)
+
+    def on_deleted(self, event: FileSystemEvent) -> None:
+        """Handle deleted files by dropping their cached state and any scheduled sync."""
+        if not event.is_directory:
+            invalidate_hash_cache(event.src_path)
+            discard_pending_sync(event.src_path)
+            forget_stat(event.src_path)
+            forget_index_entry(event.src_path)
 
     def on_modified(self, event: FileSystemEvent) -> None:
         """Handle file modifications and trigger a sync."""
-        if not event.is_directory:
-            sync_file(event.src_path)
+        if not event.is_directory and has_content_changed(event.src_path):
+            queue_sync(event.src_path)
 
     def on_created(self, event: FileSystemEvent) -> None:
         """Handle new file creations and trigger a sync."""
-        if not event.is_directory:
-            sync_file(event.src_path)
+        if not event.is_directory and has_content_changed(event.src_path):
+            queue_sync(event.src_path)
 
 
 def start_syncing():
     """Initialize the sync service, perform an initial sync, set up DBus listeners, and monitor file changes."""
     sync_all_files()  # Perform a full sync before watching for changes
 
+    start_sync_workers()
+
     observer = Observer()
     event_handler = SyncHandler()
     observer.schedule(event_handler, LOCAL_FOLDER, recursive=True)
@@ -293,6 +897,8 @@ def start_syncing():
     def stop_app(signum: Signals | int, frame: FrameType | None = None):
         observer.stop()
         observer.join()
+        stop_sync_workers()
+        flush_index()
         info(f"Sync service stopped: {Signals(signum).name}")
         exit(0)
 